@@ -1,9 +1,133 @@
 import pdfplumber
+import pypdfium2 as pdfium
+import pytesseract
+import ahocorasick
 import re
 from datetime import datetime
 from typing import List, Dict, Optional
 import pandas as pd
+import numpy as np
 import io
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
+from itertools import repeat
+
+logger = logging.getLogger(__name__)
+
+# Table extraction takes about a quarter of a second a page, so statements
+# with several table pages are split across processes. Workers are started
+# once (about 0.65s each) and reused; each task then costs one copy of the PDF.
+PDF_WORKERS = min(os.cpu_count() or 1, 8)
+TABLE_PARALLEL_MIN_PAGES = 4
+
+_table_executor: Optional[ProcessPoolExecutor] = None
+_table_executor_lock = threading.Lock()
+
+# Bank detection results, keyed by PDF content digest
+BANK_CACHE_SIZE = 32
+_detected_bank_cache: "OrderedDict[bytes, Optional[str]]" = OrderedDict()
+_detected_bank_cache_lock = threading.Lock()
+
+# pdfium is not thread-safe, even across documents, so every pdfium call is
+# made holding this lock. It is never held across OCR or table extraction.
+_pdfium_lock = threading.Lock()
+
+_AMOUNT_STRIP = str.maketrans('', '', '₹, ')
+
+_STATEMENT_FLAGS = re.IGNORECASE | re.MULTILINE
+
+def _content_digest(content: bytes) -> bytes:
+    """Return a short digest identifying file content."""
+    return hashlib.blake2b(content, digest_size=16).digest()
+
+def _page_count(pdf) -> int:
+    with _pdfium_lock:
+        return len(pdf)
+
+def _extract_page_text(pdf, page_num: int) -> str:
+    """Extract plain page text with pdfium, which is far faster than pdfminer."""
+    with _pdfium_lock:
+        page = pdf[page_num]
+        textpage = page.get_textpage()
+        try:
+            return textpage.get_text_bounded().replace('\r\n', '\n')
+        finally:
+            textpage.close()
+            page.close()
+
+def _render_page_header(pdf, page_num: int):
+    """Render the top quarter of a page to a PIL image for OCR."""
+    with _pdfium_lock:
+        page = pdf[page_num]
+        try:
+            # crop is left, bottom, right, top in points
+            _, height = page.get_size()
+            bitmap = page.render(scale=150 / 72, crop=(0, height * 3 / 4, 0, 0))
+            try:
+                # to_pil() may share the bitmap's buffer, which close() frees
+                return bitmap.to_pil().copy()
+            finally:
+                bitmap.close()
+        finally:
+            page.close()
+
+def _extract_tables(pdf_content: bytes, page_nums: List[int]) -> List[List[List[List[Optional[str]]]]]:
+    """Extract tables from the given pages, opening only those pages with pdfplumber."""
+    with pdfplumber.open(io.BytesIO(pdf_content), pages=[n + 1 for n in page_nums]) as pdf:
+        return [page.extract_tables() for page in pdf.pages]
+
+def _get_table_executor() -> ProcessPoolExecutor:
+    """Return the shared table extraction pool, starting it on first use."""
+    global _table_executor
+    with _table_executor_lock:
+        if _table_executor is None:
+            # Spawn rather than fork, since the server process already runs threads
+            _table_executor = ProcessPoolExecutor(max_workers=PDF_WORKERS,
+                                                  mp_context=multiprocessing.get_context('spawn'))
+        return _table_executor
+
+def _discard_table_executor(executor: ProcessPoolExecutor):
+    """Drop a broken pool so the next statement starts a fresh one."""
+    global _table_executor
+    with _table_executor_lock:
+        if _table_executor is executor:
+            _table_executor = None
+    executor.shutdown(wait=False)
+
+class _PdfiumDocument:
+    """A pdfium document opened and closed under _pdfium_lock."""
+    def __init__(self, pdf_content: bytes):
+        with _pdfium_lock:
+            self.pdf = pdfium.PdfDocument(pdf_content)
+
+    def __enter__(self):
+        return self.pdf
+
+    def __exit__(self, *exc_info):
+        with _pdfium_lock:
+            self.pdf.close()
+
+def _open_pdf(pdf_content: bytes, pdf=None):
+    """Open PDF content with pdfium, or reuse an already opened document without closing it."""
+    if pdf is not None:
+        return nullcontext(pdf)
+    return _PdfiumDocument(pdf_content)
+
+def _build_identifier_automaton(bank_identifiers):
+    """Build an Aho-Corasick automaton mapping every uppercased identifier to its bank."""
+    automaton = ahocorasick.Automaton()
+    for bank, identifiers in bank_identifiers.items():
+        for identifier in identifiers:
+            automaton.add_word(identifier.upper(), bank)
+    automaton.make_automaton()
+    return automaton
 
 class BankStatementParser:
     SUPPORTED_BANKS = {
@@ -21,79 +145,169 @@ class BankStatementParser:
         'axis': ['Axis Bank', 'Axis Bank Statement', 'www.axisbank.com'],
         'kotak': ['Kotak Mahindra Bank', 'Kotak Statement', 'www.kotak.com']
     }
+    _ID_AUTOMATON = _build_identifier_automaton(BANK_IDENTIFIERS)
+
+    # Statement patterns, compiled once when the class is defined
+    _HDFC_PATTERNS = (
+        # Pattern 1: Date, Description with UPI/NEFT/IMPS, Amount
+        re.compile(r'(\d{2}/\d{2}/\d{2})\s+([^0-9\n]{1,60}?(?:UPI|NEFT|IMPS)[^0-9\n]{0,40}?)\s+([\d,]+\.\d{2})\s*(?P<type>Credit|Debit|Cr|Dr)?', _STATEMENT_FLAGS),
+        # Pattern 2: Date, General Description, Amount
+        re.compile(r'(\d{2}/\d{2}/\d{2})\s+([^0-9\n]{1,80}?)\s+([\d,]+\.\d{2})\s*(?P<type>Credit|Debit|Cr|Dr)?', _STATEMENT_FLAGS),
+        # Pattern 3: Date, Amount, Description (reversed format)
+        re.compile(r'(\d{2}/\d{2}/\d{2})\s+([\d,]+\.\d{2})\s*(?P<type>Credit|Debit|Cr|Dr)?\s+([^0-9\n]{1,120})', _STATEMENT_FLAGS),
+    )
+    _AXIS_PATTERNS = (
+        # Pattern 1: Date, Description, Amount (Debit/Credit)
+        re.compile(r'(\d{2}-\d{2}-\d{4})\s+([^0-9\n]{1,80}?)\s+([\d,]+\.\d{2})\s*(?P<type>Credit|Debit|Cr|Dr)', _STATEMENT_FLAGS),
+        # Pattern 2: Date, Description with UPI/NEFT, Amount
+        re.compile(r'(\d{2}-\d{2}-\d{4})\s+([^0-9\n]{1,60}?(?:UPI|NEFT|IMPS)[^0-9\n]{0,40}?)\s+([\d,]+\.\d{2})\s*(?P<type>Credit|Debit|Cr|Dr)?', _STATEMENT_FLAGS),
+        # Pattern 3: Transaction number format
+        re.compile(r'(\d{2}\s+[A-Za-z]{3,9}\s+\d{4})\s+([^0-9\n]{1,80}?)\s+(-?[\d,]+\.\d{2})\s*(?P<type>Credit|Debit|Cr|Dr)?', _STATEMENT_FLAGS),
+    )
+    # SBI, ICICI and Kotak share the same case-sensitive CR/DR layout
+    _SBI_PATTERN = _ICICI_PATTERN = _KOTAK_PATTERN = re.compile(
+        r'(\d{2}/\d{2}/\d{4})\s+([\w \t\-\/]{1,80}?)\s+([\d,]+\.\d{2})\s*(CR|DR)'
+    )
+    _GENERIC_PATTERNS = (
+        # Date, Description, Amount pattern
+        re.compile(r'(\d{2}[-/]\d{2}[-/]\d{2,4})\s+([^0-9\n]{1,80}?)\s+([\d,]+\.\d{2})', _STATEMENT_FLAGS),
+        # Date, Credit/Debit indicator, Amount pattern
+        re.compile(r'(\d{2}[-/]\d{2}[-/]\d{2,4})[^\n]{0,120}?((?:CR|DR|Cr\.|Dr\.|Credit|Debit))[^\n]{0,120}?([\d,]+\.\d{2})', _STATEMENT_FLAGS),
+    )
+
+    # Banks whose statements may need table extraction to recover rows
+    TABLE_BANKS = ('hdfc', 'axis')
+
+    DATE_FORMATS = (
+        '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y',
+        '%Y-%m-%d', '%Y/%m/%d',
+        '%d/%m/%y', '%d-%m-%y', '%d.%m.%y'
+    )
 
     def __init__(self):
         """Initialize parser without requiring bank type."""
         self.bank_type = None
+        self._last_date_format = None
+        # Page text extracted during detection, reused by parse_pdf
+        self._page_text_source = None
+        self._page_text_cache = {}
 
-    def detect_bank_from_pdf(self, pdf_content: bytes) -> str:
-        """Detect bank type from PDF content."""
-        try:
-            print("\n=== Starting bank detection from PDF ===")
-            pdf_file = io.BytesIO(pdf_content)
-            with pdfplumber.open(pdf_file) as pdf:
-                print(f"PDF opened successfully, {len(pdf.pages)} pages found")
-                # Check first two pages for bank identifiers
-                for page_num in range(min(2, len(pdf.pages))):
-                    print(f"\nChecking page {page_num + 1} for bank identifiers")
-                    text = pdf.pages[page_num].extract_text()
-                    if text:
-                        print(f"Text extracted from page {page_num + 1}:")
-                        print("=== Start of text ===")
-                        print(text[:500])  # Print first 500 chars
-                        print("=== End of text ===")
-                        bank_type = self._identify_bank(text)
-                        if bank_type:
-                            print(f"Bank identified as: {bank_type}")
-                            return bank_type
-                        else:
-                            print("No bank identifiers found in text")
-                    else:
-                        print(f"No text could be extracted from page {page_num + 1}")
-                
-                print("\nTrying to extract text from all pages...")
-                # If no bank found in first two pages, try all pages
-                for page_num in range(len(pdf.pages)):
-                    text = pdf.pages[page_num].extract_text()
-                    if text:
-                        bank_type = self._identify_bank(text)
-                        if bank_type:
-                            print(f"Bank identified as: {bank_type} on page {page_num + 1}")
-                            return bank_type
-                
-                print("\nNo bank identifiers found in any page, trying OCR...")
-                # If still no bank found, try OCR on first page
-                first_page = pdf.pages[0]
-                image = first_page.to_image()
-                ocr_text = image.get_text()
-                if ocr_text:
-                    print("OCR text extracted:")
-                    print("=== Start of OCR text ===")
-                    print(ocr_text[:500])
-                    print("=== End of OCR text ===")
-                    bank_type = self._identify_bank(ocr_text)
-                    if bank_type:
-                        print(f"Bank identified from OCR: {bank_type}")
-                        return bank_type
-                
-        except Exception as e:
-            print(f"Error in bank detection: {str(e)}")
-            raise Exception(f"Error detecting bank from PDF: {str(e)}")
+    def detect_bank_from_pdf(self, pdf_content: bytes, pdf=None) -> str:
+        """Detect bank type from PDF content.
+        
+        An already opened pdfium document can be passed to avoid reopening it.
+        """
+        # Retries of the same upload skip the PDF walk entirely
+        digest = _content_digest(pdf_content)
+        with _detected_bank_cache_lock:
+            cached = digest in _detected_bank_cache
+            if cached:
+                _detected_bank_cache.move_to_end(digest)
+                bank_type = _detected_bank_cache[digest]
+        if not cached:
+            try:
+                with _open_pdf(pdf_content, pdf) as pdf:
+                    bank_type = self._scan_pdf_for_bank(pdf, pdf_content)
+            except Exception as e:
+                logger.error("Error in bank detection: %s", e)
+                raise Exception(f"Error detecting bank from PDF: {str(e)}")
+            
+            with _detected_bank_cache_lock:
+                _detected_bank_cache[digest] = bank_type
+                if len(_detected_bank_cache) > BANK_CACHE_SIZE:
+                    _detected_bank_cache.popitem(last=False)
+        
+        if bank_type:
+            return bank_type
         
-        print("Failed to detect bank from PDF")
+        logger.warning("Failed to detect bank from PDF")
         raise ValueError("Unable to detect bank type from statement")
 
+    def _scan_pdf_for_bank(self, pdf, pdf_content: bytes) -> Optional[str]:
+        """Walk the PDF looking for bank identifiers, falling back to OCR for scanned pages."""
+        page_count = _page_count(pdf)
+        logger.debug("Starting bank detection from PDF, %d pages found", page_count)
+        page_texts = self._page_texts_for(pdf_content)
+        has_text_layer = False
+        # Check first two pages for bank identifiers
+        for page_num in range(min(2, page_count)):
+            logger.debug("Checking page %d for bank identifiers", page_num + 1)
+            text = page_texts[page_num] = _extract_page_text(pdf, page_num)
+            if text:
+                has_text_layer = True
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Text extracted from page %d:\n%s", page_num + 1, text[:500])
+                bank_type = self._identify_bank(text)
+                if bank_type:
+                    logger.debug("Bank identified as: %s", bank_type)
+                    return bank_type
+                logger.debug("No bank identifiers found in text")
+            else:
+                logger.debug("No text could be extracted from page %d", page_num + 1)
+        
+        if page_count > 2:
+            # Identifiers often sit uncompressed in metadata or content streams,
+            # so a single pass over the raw bytes can spare the per-page walk
+            bank_type = self._identify_bank(pdf_content.decode('latin-1'))
+            if bank_type:
+                logger.debug("Bank identified as: %s from raw PDF bytes", bank_type)
+                return bank_type
+
+        logger.debug("Trying to extract text from all pages")
+        # If no bank found in first two pages, try all pages
+        for page_num in range(page_count):
+            if page_num in page_texts:
+                continue
+            text = page_texts[page_num] = _extract_page_text(pdf, page_num)
+            if text:
+                has_text_layer = True
+                bank_type = self._identify_bank(text)
+                if bank_type:
+                    logger.debug("Bank identified as: %s on page %d", bank_type, page_num + 1)
+                    return bank_type
+        
+        # OCR can only help with scanned statements; a text layer
+        # without identifiers means the bank simply isn't supported
+        if has_text_layer:
+            logger.debug("No bank identifiers found in the PDF text layer, skipping OCR")
+            return None
+        
+        logger.debug("PDF has no text layer, trying OCR on the first page")
+        bank_type = self._identify_bank_by_ocr(_render_page_header(pdf, 0))
+        if bank_type:
+            logger.debug("Bank identified from OCR: %s", bank_type)
+        return bank_type
+
+    def _identify_bank_by_ocr(self, header) -> Optional[str]:
+        """Identify bank by running OCR on the rendered header of a scanned page.
+        
+        Bank names and logos live in the page header, so only the top quarter
+        is rendered and OCRed.
+        """
+        ocr_text = pytesseract.image_to_string(header)
+        if not ocr_text:
+            return None
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("OCR text extracted:\n%s", ocr_text[:500])
+        return self._identify_bank(ocr_text)
+
+    def _page_texts_for(self, pdf_content: bytes) -> Dict[int, str]:
+        """Return the extracted-text cache for this PDF, resetting it for new content."""
+        if self._page_text_source is not pdf_content:
+            self._page_text_source = pdf_content
+            self._page_text_cache = {}
+        return self._page_text_cache
+
     def _identify_bank(self, text: str) -> Optional[str]:
         """Identify bank from text content."""
-        print("\n=== Identifying bank from text ===")
-        text = text.upper()
-        print("Looking for these identifiers:")
-        for bank, identifiers in self.BANK_IDENTIFIERS.items():
-            print(f"{bank}: {identifiers}")
-            if any(identifier.upper() in text for identifier in identifiers):
-                print(f"Found match for {bank}")
+        matched = {bank for _, bank in self._ID_AUTOMATON.iter(text.upper())}
+        # Keep BANK_IDENTIFIERS order as precedence when several banks appear
+        for bank in self.BANK_IDENTIFIERS:
+            if bank in matched:
+                logger.debug("Found match for %s", bank)
                 return bank
-        print("No bank identifiers found")
+        logger.debug("No bank identifiers found")
         return None
 
     def parse_statement(self, content: bytes, file_type: str) -> List[Dict]:
@@ -103,11 +317,19 @@ class BankStatementParser:
 
         # Detect bank type based on file type
         if file_type == 'pdf':
-            self.bank_type = self.detect_bank_from_pdf(content)
-            transactions = self.parse_pdf(content)
+            # Detection and parsing share one open document and its extracted text
+            try:
+                opened_pdf = _open_pdf(content)
+            except Exception as e:
+                raise Exception(f"Error opening PDF: {str(e)}")
+            with opened_pdf as pdf:
+                self.bank_type = self.detect_bank_from_pdf(content, pdf)
+                transactions = self.parse_pdf(content, pdf)
         elif file_type == 'csv':
-            self.bank_type = self.detect_bank_from_csv(content)
-            transactions = self.parse_csv(content)
+            # Read the CSV once and share the frame between detection and parsing
+            df = self._read_csv(content)
+            self.bank_type = self.detect_bank_from_csv(df)
+            transactions = self.parse_csv(df)
         else:
             raise ValueError(f"Unsupported file type: {file_type}")
         
@@ -116,108 +338,147 @@ class BankStatementParser:
         
         return transactions
 
-    def parse_pdf(self, pdf_content: bytes) -> List[Dict]:
-        """Parse PDF content and return list of transactions."""
+    def parse_pdf(self, pdf_content: bytes, pdf=None) -> List[Dict]:
+        """Parse PDF content and return list of transactions.
+        
+        An already opened pdfium document can be passed to avoid reopening it.
+        """
         transactions = []
+        raw_text_parts = []
+        page_texts = self._page_texts_for(pdf_content)
         
         try:
-            print("\n=== Starting PDF parsing ===")
-            pdf_file = io.BytesIO(pdf_content)
-            with pdfplumber.open(pdf_file) as pdf:
-                if not pdf.pages:
+            logger.debug("Starting PDF parsing")
+            page_results = []
+            # Pages whose text yielded nothing and that need the table fallback
+            table_pages = []
+            with _open_pdf(pdf_content, pdf) as pdf:
+                page_count = _page_count(pdf)
+                if not page_count:
                     raise ValueError("PDF file has no pages")
                 
-                print(f"\nProcessing PDF with {len(pdf.pages)} pages")
-                for page_num, page in enumerate(pdf.pages):
-                    print(f"\nExtracting text from page {page_num + 1}")
-                    text = page.extract_text()
-                    
-                    if not text:
-                        print(f"Warning: Page {page_num + 1} has no extractable text")
-                        continue
-                    
-                    # Print first few lines of text for debugging
-                    print(f"\nText content from page {page_num + 1}:")
-                    print("=== Start of text ===")
-                    print(text[:1000])  # Print first 1000 chars
-                    print("=== End of text ===")
-                    
-                    # Try to extract tables if available
-                    tables = page.extract_tables()
-                    if tables:
-                        print(f"\nFound {len(tables)} tables on page {page_num + 1}")
-                        for table_num, table in enumerate(tables):
-                            if table and len(table) > 0:
-                                print(f"\nTable {table_num + 1} content:")
-                                for row in table[:5]:  # Print first 5 rows
-                                    print(row)
-                    
-                    page_transactions = self._parse_page(text)
-                    if page_transactions:
-                        print(f"Found {len(page_transactions)} transactions on page {page_num + 1}")
-                        transactions.extend(page_transactions)
-                    else:
-                        print(f"No transactions found on page {page_num + 1}")
-                        
-                    # Try parsing tables directly
-                    if tables:
-                        print("\nTrying to parse tables directly...")
-                        for table in tables:
-                            if not table:
-                                continue
-                            table_text = '\n'.join([' '.join([str(cell) if cell else '' for cell in row]) for row in table])
-                            table_transactions = self._parse_page(table_text)
-                            if table_transactions:
-                                print(f"Found {len(table_transactions)} transactions in table")
-                                transactions.extend(table_transactions)
+                logger.debug("Processing PDF with %d pages", page_count)
+                
+                # pdfium text extraction and the regex pass take about a
+                # millisecond a page, far less than handing pages to another process
+                for page_num in range(page_count):
+                    text = page_texts.get(page_num)
+                    if text is None:
+                        text = _extract_page_text(pdf, page_num)
+                    page_transactions = self._parse_pdf_page(page_num, text)
+                    if not page_transactions and text and self.bank_type in self.TABLE_BANKS:
+                        table_pages.append(page_num)
+                    page_results.append(page_transactions)
+                    if text:
+                        raw_text_parts.append(text)
+            
+            if table_pages:
+                page_tables = self._extract_tables(pdf_content, table_pages)
+                for page_num, tables in zip(table_pages, page_tables):
+                    page_results[page_num] = self._parse_page_tables(page_num, tables)
+            
+            for page_transactions in page_results:
+                transactions.extend(page_transactions)
                         
         except Exception as e:
-            print(f"Error parsing PDF: {str(e)}")
+            logger.error("Error parsing PDF: %s", e)
             raise Exception(f"Error parsing PDF: {str(e)}")
 
         if not transactions:
-            print("\nNo transactions found in entire PDF")
-            print("Final attempt: Trying to parse using raw text patterns...")
-            try:
-                with pdfplumber.open(pdf_file) as pdf:
-                    raw_text = ""
-                    for page in pdf.pages:
-                        raw_text += page.extract_text() + "\n"
-                    
-                    # Look for common transaction patterns
-                    print("\nSearching for transaction patterns in raw text...")
-                    patterns = [
-                        # Date, Description, Amount pattern
-                        r'(\d{2}[-/]\d{2}[-/]\d{2,4})\s+([^0-9]+?)\s+([\d,]+\.\d{2})',
-                        # Date, Credit/Debit indicator, Amount pattern
-                        r'(\d{2}[-/]\d{2}[-/]\d{2,4})[^\n]*?((?:CR|DR|Cr\.|Dr\.|Credit|Debit))[^\n]*?([\d,]+\.\d{2})',
-                        r'(\d{2}[-/]\d{2}[-/]\d{2,4})[^\n]*?((?:CR|DR|Cr\.|Dr\.|Credit|Debit))[^\n]*?([\d,]+\.\d{2})',
-                    ]
-                    
-                    for pattern in patterns:
-                        matches = re.finditer(pattern, raw_text, re.MULTILINE | re.IGNORECASE)
-                        for match in matches:
-                            print(f"Found potential transaction: {match.group()}")
-                            
-            except Exception as e:
-                print(f"Error in raw text parsing: {str(e)}")
+            logger.debug("No transactions found in entire PDF, trying raw text patterns")
+            # Reuse the text extracted above rather than walking the PDF again
+            raw_text = "\n".join(raw_text_parts)
+            
+            # Look for common transaction patterns
+            if logger.isEnabledFor(logging.DEBUG):
+                for pattern in self._GENERIC_PATTERNS:
+                    for match in pattern.finditer(raw_text):
+                        logger.debug("Found potential transaction: %s", match.group())
 
         return transactions
 
-    def parse_csv(self, csv_content: bytes) -> List[Dict]:
-        """Parse CSV content and return list of transactions."""
+    def _parse_pdf_page(self, page_num: int, text: str) -> List[Dict]:
+        """Parse transactions from the extracted text of a single PDF page."""
+        if not text:
+            logger.warning("Page %d has no extractable text", page_num + 1)
+            return []
+        
+        # Log first few lines of text for debugging
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Text content from page %d:\n%s", page_num + 1, text[:1000])
+        
+        page_transactions = self._parse_page(text)
+        if page_transactions:
+            logger.debug("Found %d transactions on page %d", len(page_transactions), page_num + 1)
+        else:
+            logger.debug("No transactions found on page %d", page_num + 1)
+        return page_transactions
+
+    def _extract_tables(self, pdf_content: bytes, page_nums: List[int]) -> List[List[List[List[Optional[str]]]]]:
+        """Extract tables from the given pages, in page order.
+        
+        Table extraction is the only pdfplumber work left and by far the most
+        expensive step, so it only runs for pages whose plain text yielded
+        nothing, and only for layouts whose rows are split across table cells.
+        """
+        workers = min(PDF_WORKERS, len(page_nums))
+        if len(page_nums) < TABLE_PARALLEL_MIN_PAGES or workers < 2:
+            return _extract_tables(pdf_content, page_nums)
+        
+        # One run of pages per worker, so the PDF is sent to each worker once
+        # rather than once per page
+        chunk_size = -(-len(page_nums) // workers)
+        chunks = [page_nums[i:i + chunk_size] for i in range(0, len(page_nums), chunk_size)]
+        executor = _get_table_executor()
         try:
-            # Read CSV content using pandas
-            df = pd.read_csv(pd.io.common.BytesIO(csv_content))
+            chunk_tables = list(executor.map(_extract_tables, repeat(pdf_content), chunks))
+        except BrokenProcessPool:
+            logger.warning("Table extraction pool broke, extracting in-process")
+            _discard_table_executor(executor)
+            return _extract_tables(pdf_content, page_nums)
+        # map() yields results in chunk order
+        return [tables for chunk in chunk_tables for tables in chunk]
+
+    def _parse_page_tables(self, page_num: int, tables: List[List[List[Optional[str]]]]) -> List[Dict]:
+        """Parse transactions from the tables extracted from a single PDF page."""
+        transactions = []
+        if tables:
+            logger.debug("Found %d tables on page %d, parsing them directly", len(tables), page_num + 1)
+            if logger.isEnabledFor(logging.DEBUG):
+                for table_num, table in enumerate(tables):
+                    if table and len(table) > 0:
+                        logger.debug("Table %d content (first 5 rows): %s", table_num + 1, table[:5])
             
+            for table in tables:
+                if not table:
+                    continue
+                table_text = '\n'.join([' '.join([str(cell) if cell else '' for cell in row]) for row in table])
+                table_transactions = self._parse_page(table_text)
+                if table_transactions:
+                    logger.debug("Found %d transactions in table", len(table_transactions))
+                    transactions.extend(table_transactions)
+        
+        return transactions
+
+    def _read_csv(self, csv_content: bytes) -> pd.DataFrame:
+        """Read CSV content into a DataFrame of strings with normalized column names."""
+        try:
+            # Keep cells as strings; dates and amounts are parsed per column later
+            df = pd.read_csv(io.BytesIO(csv_content), engine='c', dtype=str)
+        except Exception as e:
+            raise ValueError(f"Error reading CSV: {str(e)}")
+        
+        # Convert column names to lowercase for case-insensitive matching
+        df.columns = [str(col).lower().strip() for col in df.columns]
+        return df
+
+    def parse_csv(self, df: pd.DataFrame) -> List[Dict]:
+        """Parse a CSV statement read by _read_csv and return list of transactions."""
+        try:
             if df.empty:
                 raise ValueError("CSV file is empty")
             
-            # Convert column names to lowercase for case-insensitive matching
-            df.columns = [col.lower().strip() for col in df.columns]
-            print(f"Found columns: {', '.join(df.columns)}")
-            
-            transactions = []
+            logger.debug("Found columns: %s", ', '.join(df.columns))
             
             if self.bank_type == 'hdfc':
                 required_columns = ['date', 'narration', 'debit', 'credit', 'balance']
@@ -246,62 +507,40 @@ class BankStatementParser:
             if missing_columns:
                 raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
             
-            # Process each row
-            for idx, row in df.iterrows():
-                try:
-                    transaction = {}
-                    
-                    # Parse date
-                    date_col = self._find_column(df, required_columns[0])
-                    date_str = str(row[date_col]).strip()
-                    
-                    if not date_str:
-                        print(f"Warning: Empty date in row {idx + 1}")
-                        continue
-                        
-                    try:
-                        transaction_date = datetime.strptime(date_str, date_format)
-                        transaction['date'] = transaction_date.strftime('%Y-%m-%d')
-                    except ValueError as e:
-                        print(f"Warning: Invalid date format in row {idx + 1}: {date_str}")
-                        continue
-                    
-                    # Get description/narration
-                    desc_col = self._find_column(df, required_columns[1])
-                    transaction['description'] = str(row[desc_col]).strip()
-                    
-                    if not transaction['description']:
-                        print(f"Warning: Empty description in row {idx + 1}")
-                        continue
-                    
-                    # Get amount and type (credit/debit)
-                    debit_col = self._find_column(df, 'debit')
-                    credit_col = self._find_column(df, 'credit')
-                    
-                    debit_amount = row[debit_col]
-                    credit_amount = row[credit_col]
-                    
-                    if pd.notna(credit_amount) and float(str(credit_amount).replace(',', '')) > 0:
-                        transaction['amount'] = abs(float(str(credit_amount).replace(',', '')))
-                        transaction['type'] = 'credit'
-                    elif pd.notna(debit_amount) and float(str(debit_amount).replace(',', '')) > 0:
-                        transaction['amount'] = abs(float(str(debit_amount).replace(',', '')))
-                        transaction['type'] = 'debit'
-                    else:
-                        print(f"Warning: No valid amount in row {idx + 1}")
-                        continue
-                    
-                    # Add category and bank
-                    transaction['category'] = 'Other'  # Default category
-                    transaction['bank'] = self.SUPPORTED_BANKS.get(self.bank_type, 'Unknown Bank')
-                    
-                    transactions.append(transaction)
-                    
-                except Exception as e:
-                    print(f"Warning: Error processing row {idx + 1}: {str(e)}")
-                    continue
+            date_col = self._find_column(df, required_columns[0])
+            desc_col = self._find_column(df, required_columns[1])
+            debit_col = self._find_column(df, required_columns[2])
+            credit_col = self._find_column(df, required_columns[3])
             
-            return transactions
+            # Parse whole columns at once instead of row by row
+            # cache=True parses each distinct date string only once
+            dates = pd.to_datetime(df[date_col].astype(str).str.strip(), format=date_format, errors='coerce', cache=True)
+            descriptions = df[desc_col].fillna('').astype(str).str.strip()
+            credit = pd.to_numeric(df[credit_col].astype(str).str.replace(',', '', regex=False), errors='coerce')
+            debit = pd.to_numeric(df[debit_col].astype(str).str.replace(',', '', regex=False), errors='coerce')
+            
+            is_credit = credit > 0
+            is_debit = ~is_credit & (debit > 0)
+            valid = dates.notna() & (descriptions != '') & (is_credit | is_debit)
+            
+            # Format each distinct date once and broadcast it back to the rows
+            codes, unique_dates = pd.factorize(dates[valid])
+            formatted_dates = unique_dates.strftime('%Y-%m-%d').to_numpy()[codes]
+            
+            skipped = int((~valid).sum())
+            if skipped:
+                logger.warning("Skipped %d row(s) with invalid date, description or amount", skipped)
+            
+            result = pd.DataFrame({
+                'date': pd.Series(formatted_dates, index=descriptions[valid].index),
+                'description': descriptions[valid],
+                'amount': credit.where(is_credit, debit)[valid].abs(),
+                'type': np.where(is_credit[valid], 'credit', 'debit'),
+                'category': 'Other',  # Default category
+                'bank': self.SUPPORTED_BANKS.get(self.bank_type, 'Unknown Bank')
+            })
+            
+            return result.to_dict(orient='records')
             
         except Exception as e:
             raise Exception(f"Error parsing CSV: {str(e)}")
@@ -331,16 +570,8 @@ class BankStatementParser:
         else:
             # Try generic patterns if bank type is unknown
             transactions = []
-            patterns = [
-                # Date, Description, Amount pattern
-                r'(\d{2}[-/]\d{2}[-/]\d{2,4})\s+([^0-9]+?)\s+([\d,]+\.\d{2})',
-                # Date, Credit/Debit indicator, Amount pattern
-                r'(\d{2}[-/]\d{2}[-/]\d{2,4})[^\n]*?((?:CR|DR|Cr\.|Dr\.|Credit|Debit))[^\n]*?([\d,]+\.\d{2})',
-            ]
-            
-            for pattern in patterns:
-                matches = re.finditer(pattern, text, re.MULTILINE | re.IGNORECASE)
-                for match in matches:
+            for pattern in self._GENERIC_PATTERNS:
+                for match in pattern.finditer(text):
                     try:
                         date_str = match.group(1)
                         description = match.group(2).strip() if len(match.groups()) > 2 else "Unknown Transaction"
@@ -360,62 +591,68 @@ class BankStatementParser:
                         transactions.append(transaction)
                         
                     except Exception as e:
-                        print(f"Error parsing transaction: {str(e)}")
+                        logger.warning("Error parsing transaction: %s", e)
                         continue
                         
             return transactions
 
     def _parse_date(self, date_str: str) -> Optional[str]:
         """Parse date string to standard format."""
-        try:
-            # Try different date formats
-            date_formats = [
-                '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y',
-                '%Y-%m-%d', '%Y/%m/%d',
-                '%d/%m/%y', '%d-%m-%y', '%d.%m.%y'
-            ]
-            
-            for fmt in date_formats:
-                try:
-                    return datetime.strptime(date_str.strip(), fmt).strftime('%Y-%m-%d')
-                except:
-                    continue
-            
-            return None
-        except:
+        if not date_str:
             return None
+        date_str = date_str.strip()
+        
+        # A statement uses one date format throughout, so try the last hit first
+        if self._last_date_format:
+            try:
+                return datetime.strptime(date_str, self._last_date_format).strftime('%Y-%m-%d')
+            except ValueError:
+                pass
+        
+        for fmt in self.DATE_FORMATS:
+            if fmt == self._last_date_format:
+                continue
+            try:
+                parsed_date = datetime.strptime(date_str, fmt)
+            except ValueError:
+                continue
+            self._last_date_format = fmt
+            return parsed_date.strftime('%Y-%m-%d')
+        
+        return None
 
     def _parse_amount(self, amount_str: str) -> float:
-        """Parse amount string to float."""
-        try:
-            # Remove currency symbols and commas
-            amount_str = re.sub(r'[₹,]', '', amount_str.strip())
-            return float(amount_str)
-        except:
-            return 0.0
+        """Parse amount string to float.
+        
+        Raises ValueError for malformed amounts; the statement patterns only
+        ever capture digits, commas and a decimal part.
+        """
+        # Remove currency symbols, commas and spaces
+        amount_str = amount_str.translate(_AMOUNT_STRIP)
+        return float(amount_str) if amount_str else 0.0
+
+    def _match_transaction_type(self, match: re.Match, description: str) -> str:
+        """Classify a statement match as credit or debit.
+        
+        A trailing Cr/Dr indicator captured by the pattern wins; rows without
+        one fall back to looking for a credit hint in the description.
+        """
+        indicator = match.group('type')
+        if indicator:
+            return 'credit' if indicator[0] in 'cC' else 'debit'
+        return 'credit' if 'cr' in description.lower() else 'debit'
 
     def _parse_hdfc(self, text: str) -> List[Dict]:
         """Parse HDFC Bank statement format."""
         transactions = []
         try:
-            # Common patterns for HDFC statements
-            patterns = [
-                # Pattern 1: Date, Description with UPI/NEFT/IMPS, Amount
-                r'(\d{2}/\d{2}/\d{2})\s+([^0-9]+?(?:UPI|NEFT|IMPS)[^0-9]*?)\s+([\d,]+\.\d{2})\s*(?:Cr|Dr)?',
-                # Pattern 2: Date, General Description, Amount
-                r'(\d{2}/\d{2}/\d{2})\s+([^0-9]+?)\s+([\d,]+\.\d{2})\s*(?:Cr|Dr)?',
-                # Pattern 3: Date, Amount, Description (reversed format)
-                r'(\d{2}/\d{2}/\d{2})\s+([\d,]+\.\d{2})\s*(?:Cr|Dr)?\s+([^0-9]+(?:UPI|NEFT|IMPS)?[^0-9]*)',
-            ]
-            
-            for pattern in patterns:
-                matches = re.finditer(pattern, text, re.MULTILINE | re.IGNORECASE)
-                for match in matches:
+            for pattern_num, pattern in enumerate(self._HDFC_PATTERNS):
+                for match in pattern.finditer(text):
                     try:
                         # Extract components based on pattern
-                        if pattern == patterns[2]:  # Reversed format
+                        if pattern_num == 2:  # Reversed format, type group sits before the description
                             date_str = match.group(1)
-                            description = match.group(3).strip()
+                            description = match.group(4).strip()
                             amount_str = match.group(2)
                         else:
                             date_str = match.group(1)
@@ -423,9 +660,7 @@ class BankStatementParser:
                             amount_str = match.group(3)
                         
                         # Determine transaction type
-                        type_indicators = ['CR', 'Cr.', 'Credit']
-                        transaction_type = 'credit' if any(indicator.lower() in text[match.start():match.end()].lower() 
-                                                        for indicator in type_indicators) else 'debit'
+                        transaction_type = self._match_transaction_type(match, description)
                         
                         # Create transaction
                         transaction = {
@@ -439,11 +674,11 @@ class BankStatementParser:
                         transactions.append(transaction)
                         
                     except Exception as e:
-                        print(f"Error parsing HDFC transaction: {str(e)}")
+                        logger.warning("Error parsing HDFC transaction: %s", e)
                         continue
                         
         except Exception as e:
-            print(f"Error in HDFC parser: {str(e)}")
+            logger.error("Error in HDFC parser: %s", e)
             
         return transactions
 
@@ -451,19 +686,8 @@ class BankStatementParser:
         """Parse Axis Bank statement format."""
         transactions = []
         try:
-            # Multiple Axis Bank format patterns
-            patterns = [
-                # Pattern 1: Date, Description, Amount (Debit/Credit)
-                r'(\d{2}-\d{2}-\d{4})\s+([^0-9]+?)\s+([\d,]+\.\d{2})\s*(?:Cr|Dr)',
-                # Pattern 2: Date, Description with UPI/NEFT, Amount
-                r'(\d{2}-\d{2}-\d{4})\s+([^0-9]+?(?:UPI|NEFT|IMPS)[^0-9]*?)\s+([\d,]+\.\d{2})',
-                # Pattern 3: Transaction number format
-                r'(\d{2}\s+[A-Za-z]+\s+\d{4})\s+([^0-9]+?)\s+(-?[\d,]+\.\d{2})',
-            ]
-            
-            for pattern in patterns:
-                matches = re.finditer(pattern, text, re.MULTILINE | re.IGNORECASE)
-                for match in matches:
+            for pattern in self._AXIS_PATTERNS:
+                for match in pattern.finditer(text):
                     try:
                         date_str = match.group(1)
                         description = match.group(2).strip()
@@ -475,9 +699,7 @@ class BankStatementParser:
                             continue
                             
                         # Determine transaction type
-                        type_indicators = ['CR', 'Cr.', 'Credit']
-                        transaction_type = 'credit' if any(indicator.lower() in text[match.start():match.end()].lower() 
-                                                        for indicator in type_indicators) else 'debit'
+                        transaction_type = self._match_transaction_type(match, description)
                         
                         transaction = {
                             'date': self._parse_date(date_str),
@@ -490,11 +712,11 @@ class BankStatementParser:
                         transactions.append(transaction)
                         
                     except Exception as e:
-                        print(f"Error parsing Axis transaction: {str(e)}")
+                        logger.warning("Error parsing Axis transaction: %s", e)
                         continue
                         
         except Exception as e:
-            print(f"Error in Axis parser: {str(e)}")
+            logger.error("Error in Axis parser: %s", e)
             
         return transactions
 
@@ -502,10 +724,7 @@ class BankStatementParser:
         """Parse SBI statement format."""
         transactions = []
         
-        # SBI format pattern
-        pattern = r'(\d{2}/\d{2}/\d{4})\s+([\w\s\-\/]+?)\s+([\d,]+\.\d{2})\s*(CR|DR)'
-        
-        for match in re.finditer(pattern, text):
+        for match in self._SBI_PATTERN.finditer(text):
             date_str, description, amount_str, type_str = match.groups()
             
             transaction = {
@@ -526,10 +745,7 @@ class BankStatementParser:
         """Parse ICICI Bank statement format."""
         transactions = []
         
-        # ICICI format pattern
-        pattern = r'(\d{2}/\d{2}/\d{4})\s+([\w\s\-\/]+?)\s+([\d,]+\.\d{2})\s*(CR|DR)'
-        
-        for match in re.finditer(pattern, text):
+        for match in self._ICICI_PATTERN.finditer(text):
             date_str, description, amount_str, type_str = match.groups()
             
             transaction = {
@@ -550,10 +766,7 @@ class BankStatementParser:
         """Parse Kotak Bank statement format."""
         transactions = []
         
-        # Kotak format pattern
-        pattern = r'(\d{2}/\d{2}/\d{4})\s+([\w\s\-\/]+?)\s+([\d,]+\.\d{2})\s*(CR|DR)'
-        
-        for match in re.finditer(pattern, text):
+        for match in self._KOTAK_PATTERN.finditer(text):
             date_str, description, amount_str, type_str = match.groups()
             
             transaction = {
@@ -570,11 +783,10 @@ class BankStatementParser:
         
         return transactions
 
-    def detect_bank_from_csv(self, csv_content: bytes) -> str:
-        """Detect bank type from CSV content."""
+    def detect_bank_from_csv(self, df: pd.DataFrame) -> str:
+        """Detect bank type from a CSV statement read by _read_csv."""
         try:
-            df = pd.read_csv(pd.io.common.BytesIO(csv_content))
-            columns = [col.lower().strip() for col in df.columns]
+            columns = list(df.columns)
             
             # Check column patterns for each bank
             if all(col in columns for col in ['date', 'narration', 'debit', 'credit', 'balance']):
@@ -1,3 +1,28 @@
+import re
+
+import ahocorasick
+import pandas as pd
+
+
+def _build_keyword_automaton(categories):
+    """Build an Aho-Corasick automaton mapping every keyword to its category."""
+    automaton = ahocorasick.Automaton()
+    for category, keywords in categories.items():
+        for keyword in keywords:
+            automaton.add_word(keyword.lower(), category)
+    automaton.make_automaton()
+    return automaton
+
+
+def _build_category_patterns(categories):
+    """Compile one case-insensitive keyword alternation per category."""
+    return {
+        category: re.compile('|'.join(map(re.escape, keywords)), re.IGNORECASE)
+        for category, keywords in categories.items()
+        if keywords
+    }
+
+
 class TransactionCategorizer:
     # Define category keywords
     CATEGORIES = {
@@ -13,6 +38,10 @@ class TransactionCategorizer:
         'other': []  # Default category
     }
     
+    # Matches all keywords in a single pass over the notes
+    _KEYWORD_AUTOMATON = _build_keyword_automaton(CATEGORIES)
+    _CATEGORY_PATTERNS = _build_category_patterns(CATEGORIES)
+    
     @staticmethod
     def categorize_transaction(transaction_details):
         if not transaction_details.get('notes'):
@@ -21,17 +50,44 @@ class TransactionCategorizer:
         notes = transaction_details['notes'].lower()
         transaction_type = transaction_details.get('type', '')
         
+        matched = {category for _, category in TransactionCategorizer._KEYWORD_AUTOMATON.iter(notes)}
+        
         # If it's a credit transaction and contains salary-related keywords
-        if transaction_type == 'credit' and any(keyword in notes for keyword in TransactionCategorizer.CATEGORIES['salary']):
+        if transaction_type == 'credit' and 'salary' in matched:
             return 'salary'
             
-        # Check other categories
-        for category, keywords in TransactionCategorizer.CATEGORIES.items():
-            if any(keyword in notes for keyword in keywords):
+        # Check other categories in priority order
+        for category in TransactionCategorizer.CATEGORIES:
+            if category in matched:
                 return category
                 
         return 'other'
         
+    @staticmethod
+    def categorize_batch(df: pd.DataFrame) -> pd.Series:
+        """
+        Categorize every row of a DataFrame in one vectorized pass.
+        
+        Expects a 'notes' column and optionally a 'type' column; applies the
+        same rules as categorize_transaction.
+        """
+        patterns = TransactionCategorizer._CATEGORY_PATTERNS
+        notes = df['notes'].fillna('').astype(str)
+        result = pd.Series('other', index=df.index, dtype=object)
+        
+        # Salary keywords on credits take precedence over everything else
+        if 'type' in df.columns:
+            is_salary = (df['type'] == 'credit') & notes.str.contains(patterns['salary'])
+            result = result.mask(is_salary, 'salary')
+        
+        for category, pattern in patterns.items():
+            uncategorized = result.eq('other')
+            if not uncategorized.any():
+                break
+            result = result.mask(uncategorized & notes.str.contains(pattern), category)
+        
+        return result
+        
     @staticmethod
     def get_transaction_summary(transaction_details):
         category = TransactionCategorizer.categorize_transaction(transaction_details)
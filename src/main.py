@@ -2,30 +2,33 @@ from fastapi import FastAPI, UploadFile, HTTPException, File
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from starlette.datastructures import Headers
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi import Request
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+import asyncio
+from contextlib import asynccontextmanager
 import io
 from datetime import datetime
-import json
+import orjson
 import os
 from pydantic import BaseModel
 
 from .ocr_handler import OCRHandler
 from .categorizer import TransactionCategorizer
 from .bank_parser import BankStatementParser
+from .transaction_store import TransactionStore
 
 # Create data directory if it doesn't exist
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
 os.makedirs(DATA_DIR, exist_ok=True)
 
-# Define transactions file path
-TRANSACTIONS_FILE = os.path.join(DATA_DIR, 'transactions.json')
+# Define transactions database path, and the JSON file older versions stored transactions in
+TRANSACTIONS_DB = os.path.join(DATA_DIR, 'transactions.db')
+LEGACY_TRANSACTIONS_FILE = os.path.join(DATA_DIR, 'transactions.json')
 
-# Create empty transactions file if it doesn't exist
-if not os.path.exists(TRANSACTIONS_FILE):
-    with open(TRANSACTIONS_FILE, 'w') as f:
-        json.dump([], f)
+# Transactions are served from memory; the database is only read once at startup
+store = TransactionStore(TRANSACTIONS_DB, legacy_json_path=LEGACY_TRANSACTIONS_FILE)
 
 # Define transaction categories
 TRANSACTION_CATEGORIES = [
@@ -43,6 +46,18 @@ TRANSACTION_CATEGORIES = [
     'Other'
 ]
 
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson, which is much faster than the stdlib encoder."""
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the transaction store on startup and write pending changes on shutdown."""
+    store.load()
+    yield
+    await store.close()
+
 app = FastAPI(
     title="MoneyApp API",
     description="""
@@ -58,7 +73,9 @@ app = FastAPI(
     version="1.0.0",
     contact={
         "name": "MoneyApp Support",
-    }
+    },
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Mount static files directory
@@ -67,7 +84,54 @@ app.mount("/static", StaticFiles(directory="src/static"), name="static")
 # Templates
 templates = Jinja2Templates(directory="src/templates")
 
-# Configure CORS
+# Add supported banks to the app state
+SUPPORTED_BANKS = BankStatementParser.SUPPORTED_BANKS
+
+# Upload limits
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB
+# Whole request bodies may be slightly larger, for the multipart framing around the file
+MAX_REQUEST_SIZE = MAX_UPLOAD_SIZE + 64 * 1024
+UPLOAD_TOO_LARGE = "File too large. Maximum size is 10MB"
+
+class RequestSizeLimitMiddleware:
+    """Reject request bodies over max_size while they are still being received.
+
+    Multipart forms are parsed, and their files spooled, before an endpoint
+    runs, so a limit checked there only applies once the whole body is in.
+    """
+    def __init__(self, app, max_size: int):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length", "")
+        if content_length.isdigit() and int(content_length) > self.max_size:
+            response = ORJSONResponse({"detail": UPLOAD_TOO_LARGE}, status_code=400)
+            await response(scope, receive, send)
+            return
+
+        # Bodies sent without a length are counted as they arrive
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_size:
+                    raise HTTPException(status_code=400, detail=UPLOAD_TOO_LARGE)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+app.add_middleware(RequestSizeLimitMiddleware, max_size=MAX_REQUEST_SIZE)
+
+# Configure CORS. Middleware added last runs first, so CORS headers also
+# reach responses from the size limit above.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -76,9 +140,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Add supported banks to the app state
-SUPPORTED_BANKS = BankStatementParser.SUPPORTED_BANKS
-
 class CategoryUpdate(BaseModel):
     category: str
 
@@ -86,45 +147,35 @@ class TransactionCategoryUpdate(BaseModel):
     transaction_id: int
     category: str
 
+async def read_upload(upload: UploadFile) -> bytes:
+    """Read an upload, rejecting it if it exceeds MAX_UPLOAD_SIZE.
+
+    RequestSizeLimitMiddleware has already capped the request body; this
+    applies the exact limit to the file itself.
+    """
+    if upload.size is not None and upload.size > MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=400, detail=UPLOAD_TOO_LARGE)
+    # Reading one byte past the limit tells an oversized file apart without
+    # reading the rest of it or joining chunks into a second copy
+    content = await upload.read(MAX_UPLOAD_SIZE + 1)
+    if len(content) > MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=400, detail=UPLOAD_TOO_LARGE)
+    return content
+
 def load_transactions() -> List[Dict]:
-    try:
-        with open(TRANSACTIONS_FILE, 'r') as f:
-            transactions = json.load(f)
-            # Sort transactions by date and timestamp
-            return sorted(transactions, 
-                        key=lambda x: (x.get('date', ''), x.get('timestamp', '')), 
-                        reverse=True)
-    except:
-        return []
+    return store.items
 
-def save_transaction(transaction: Dict):
-    """Save a transaction to the JSON file, checking for duplicates."""
-    transactions = load_transactions()
-    
-    # Add default category if not present
-    if 'category' not in transaction:
-        transaction['category'] = 'Other'
-    
-    # Add timestamp if not present
-    if 'timestamp' not in transaction:
-        transaction['timestamp'] = datetime.now().isoformat()
+def save_transactions(new_transactions: List[Dict], timestamp: Optional[str] = None) -> int:
+    """Save transactions, skipping duplicates.
     
-    # Create a unique key for the new transaction
-    new_key = f"{transaction['date']}_{transaction['amount']}_{transaction['description']}_{transaction['type']}"
-    
-    # Check if this transaction already exists
-    existing_keys = {f"{t['date']}_{t['amount']}_{t['description']}_{t['type']}" for t in transactions}
-    
-    if new_key not in existing_keys:
-        transactions.append(transaction)
-        # Sort transactions before saving
-        transactions = sorted(transactions, 
-                           key=lambda x: (x.get('date', ''), x.get('timestamp', '')), 
-                           reverse=True)
-        with open(TRANSACTIONS_FILE, 'w') as f:
-            json.dump(transactions, f, indent=2)
-        return True
-    return False
+    Transactions without a timestamp get the given one, or the current time.
+    Returns the number of transactions actually saved.
+    """
+    return store.add(new_transactions, timestamp)
+
+def save_transaction(transaction: Dict):
+    """Save a transaction, checking for duplicates."""
+    return save_transactions([transaction]) == 1
 
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
@@ -145,10 +196,12 @@ async def health_check():
     return {"status": "healthy"}
 
 @app.get("/transactions/summary")
-async def get_transactions_summary():
+async def get_transactions_summary(request: Request):
     """
     Get a summary of all transactions.
     
+    Responds with 304 Not Modified when If-None-Match carries the current ETag.
+    
     Returns:
         Dict containing:
         - total_credit: Total amount credited
@@ -156,25 +209,17 @@ async def get_transactions_summary():
         - transactions: List of all transactions
     """
     try:
-        transactions = load_transactions()
+        etag = store.etag
+        if_none_match = request.headers.get('if-none-match')
+        if if_none_match and etag in (tag.strip() for tag in if_none_match.split(',')):
+            return Response(status_code=304, headers={"ETag": etag})
         
-        total_credit = 0
-        total_debit = 0
-        
-        for transaction in transactions:
-            amount = float(transaction.get('amount', 0))
-            if transaction.get('type') == 'credit':
-                total_credit += amount
-            else:
-                total_debit += amount
-        
-        return {
-            "total_credit": round(total_credit, 2),
-            "total_debit": round(total_debit, 2),
-            "transactions": sorted(transactions, 
-                                key=lambda x: x.get('timestamp', ''), 
-                                reverse=True)
-        }
+        return ORJSONResponse({
+            "total_credit": round(store.credit_total, 2),
+            "total_debit": round(store.debit_total, 2),
+            # The store keeps transactions ordered newest first
+            "transactions": store.items
+        }, headers={"ETag": etag})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -205,10 +250,10 @@ async def process_transaction(image: UploadFile) -> Dict[str, Any]:
             raise HTTPException(status_code=400, detail="File must be an image")
             
         # Read image content
-        image_bytes = await image.read()
+        image_bytes = await read_upload(image)
         
-        # Process image with OCR
-        text = OCRHandler.process_image(image_bytes)
+        # Process image with OCR in a worker thread; tesseract would otherwise block the event loop
+        text = await asyncio.to_thread(OCRHandler.process_image, image_bytes)
         
         # Extract all transactions
         transactions = OCRHandler.extract_transactions(text)
@@ -216,19 +261,9 @@ async def process_transaction(image: UploadFile) -> Dict[str, Any]:
         if not transactions:
             raise HTTPException(status_code=400, detail="No valid transactions found in the image")
         
-        # Add timestamp to each transaction
-        timestamp = datetime.now().isoformat()
-        for transaction in transactions:
-            transaction['timestamp'] = timestamp
-        
-        # Save non-duplicate transactions
-        saved_count = 0
-        skipped_count = 0
-        for transaction in transactions:
-            if save_transaction(transaction):
-                saved_count += 1
-            else:
-                skipped_count += 1
+        # Save non-duplicate transactions, all stamped with one timestamp
+        saved_count = save_transactions(transactions, datetime.now().isoformat())
+        skipped_count = len(transactions) - saved_count
         
         message = f"Successfully processed {saved_count} new transaction(s)"
         if skipped_count > 0:
@@ -241,6 +276,10 @@ async def process_transaction(image: UploadFile) -> Dict[str, Any]:
             "skipped_count": skipped_count
         }
         
+    except HTTPException:
+        # Re-raise HTTP exceptions as is
+        raise
+        
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -321,12 +360,9 @@ async def process_bank_statement(
             raise HTTPException(status_code=400, detail="No file provided")
         
         # Read file content
-        content = await file.read()
+        content = await read_upload(file)
         if not content:
             raise HTTPException(status_code=400, detail="Empty file uploaded")
-            
-        if len(content) > 10 * 1024 * 1024:  # 10MB
-            raise HTTPException(status_code=400, detail="File too large. Maximum size is 10MB")
         
         # Get file extension
         if not file.filename:
@@ -344,7 +380,8 @@ async def process_bank_statement(
         
         try:
             # Parse statement and detect bank
-            transactions = parser.parse_statement(content, file_extension)
+            # Parse in a worker thread; PDF parsing would otherwise block the event loop
+            transactions = await asyncio.to_thread(parser.parse_statement, content, file_extension)
             detected_bank = parser.bank_type
             
             if not detected_bank:
@@ -354,16 +391,14 @@ async def process_bank_statement(
                 raise ValueError("No transactions found in statement")
             
             # Save transactions with bank information
-            saved_count = 0
+            bank_name = SUPPORTED_BANKS[detected_bank]
             for transaction in transactions:
-                # Add bank information to transaction
-                transaction['bank'] = BankStatementParser.SUPPORTED_BANKS[detected_bank]
-                if save_transaction(transaction):
-                    saved_count += 1
+                transaction['bank'] = bank_name
+            saved_count = save_transactions(transactions)
             
             return {
-                "message": f"Successfully processed {saved_count} transactions from {BankStatementParser.SUPPORTED_BANKS[detected_bank]}",
-                "bank": BankStatementParser.SUPPORTED_BANKS[detected_bank],
+                "message": f"Successfully processed {saved_count} transactions from {bank_name}",
+                "bank": bank_name,
                 "transactions_count": saved_count,
                 "transactions": transactions[:5]  # Return first 5 transactions as preview
             }
@@ -388,8 +423,7 @@ async def process_bank_statement(
 async def clear_transactions():
     """Clear all stored transactions."""
     try:
-        with open(TRANSACTIONS_FILE, 'w') as f:
-            json.dump([], f)
+        store.clear()
         return {"message": "All transactions cleared successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -406,24 +440,8 @@ async def update_transaction_category(transaction_id: int, update: CategoryUpdat
         
         transactions = load_transactions()
         if 0 <= transaction_id < len(transactions):
-            # Store old category for logging
-            old_category = transactions[transaction_id].get('category', 'Other')
-            
-            # Update category
-            transactions[transaction_id]['category'] = update.category
-            
-            # Update timestamp
-            transactions[transaction_id]['timestamp'] = datetime.now().isoformat()
-            
-            # Sort and save transactions
-            transactions = sorted(
-                transactions, 
-                key=lambda x: (x.get('date', ''), x.get('timestamp', '')), 
-                reverse=True
-            )
-            
-            with open(TRANSACTIONS_FILE, 'w') as f:
-                json.dump(transactions, f, indent=2)
+            # Update category and timestamp, keeping the old category for logging
+            old_category = store.update_categories({transaction_id: update.category})[transaction_id]
             
             print(f"Category updated for transaction {transaction_id}: {old_category} -> {update.category}")
             
@@ -450,31 +468,29 @@ async def update_transaction_category(transaction_id: int, update: CategoryUpdat
 async def update_categories(updated_categories: dict):
     try:
         transactions = load_transactions()
+        updates = {}
         for transaction_id, category in updated_categories.items():
-            if int(transaction_id) < len(transactions):
+            if 0 <= int(transaction_id) < len(transactions):
                 if category not in TRANSACTION_CATEGORIES:
                     raise HTTPException(
                         status_code=400, 
                         detail=f"Invalid category. Must be one of: {', '.join(TRANSACTION_CATEGORIES)}"
                     )
-                transactions[int(transaction_id)]['category'] = category
-                transactions[int(transaction_id)]['timestamp'] = datetime.now().isoformat()
+                updates[int(transaction_id)] = category
             else:
                 raise HTTPException(
                     status_code=404, 
                     detail=f"Transaction with ID {transaction_id} not found"
                 )
-        transactions = sorted(
-            transactions, 
-            key=lambda x: (x.get('date', ''), x.get('timestamp', '')), 
-            reverse=True
-        )
-        with open(TRANSACTIONS_FILE, 'w') as f:
-            json.dump(transactions, f, indent=2)
+        store.update_categories(updates)
         return {'message': 'Categories updated successfully'}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=9000, reload=True)
\ No newline at end of file
+    # Each worker keeps its own in-memory store, so more than one would serve
+    # diverging views of the database; only raise this once that changes.
+    workers = int(os.environ.get("MONEYAPP_WORKERS", "1"))
+    # uvicorn picks uvloop and httptools by default whenever they are installed
+    uvicorn.run("src.main:app", host="0.0.0.0", port=9000, workers=workers)
\ No newline at end of file
@@ -1,69 +1,159 @@
 import pytesseract
 from PIL import Image
+import ahocorasick
 import re
 from datetime import datetime
-from dateutil import parser
+from functools import lru_cache
 import io
 
+# Patterns are compiled once at import instead of on every line of every image
+# Anything OCR may produce for the Rupee symbol: Rs/INR, a '2' misread before
+# digits, or the symbol itself
+_RUPEE_MARK = r'(?:(?:Rs\.?|INR|\bRs\b)\s*|(?<![0-9])2(?=\s*[0-9])|₹)'
+# One mark, optionally followed by a second that collapses into it. This is a
+# single-pass equivalent of replacing Rs/INR, then misread 2s, then '₹\s*₹'.
+_RUPEE_RE = re.compile(rf'{_RUPEE_MARK}(?:\s*{_RUPEE_MARK})?', re.IGNORECASE)
+
+_MONTH = r'Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?'
+
+# Date patterns with the strptime formats to try on "a b year", in order.
+# Numeric dates are read month first, like dateutil does.
+_DATE_PATTERNS = [(re.compile(pattern, re.IGNORECASE), formats) for pattern, formats in (
+    # DD Month YYYY
+    (rf'(?P<a>\d{{1,2}})\s*(?P<b>{_MONTH})\s*(?P<y>\d{{2,4}})?', ('%d %b %Y',)),
+    # DD-MM-YYYY or DD/MM/YYYY
+    (r'(?P<a>\d{1,2})[-/](?P<b>\d{1,2})[-/](?P<y>\d{2,4})', ('%m %d %Y', '%d %m %Y')),
+    # YYYY-MM-DD
+    (r'(?P<y>\d{4})[-/](?P<a>\d{1,2})[-/](?P<b>\d{1,2})', ('%m %d %Y',)),
+    # Month DD, YYYY
+    (rf'(?P<a>{_MONTH})\s*(?P<b>\d{{1,2}})(?:\s*,\s*|\s+)(?P<y>\d{{4}})', ('%b %d %Y',)),
+)]
+
+# Lines without a digit or Rupee symbol can hold neither a date nor an amount
+_FAST_REJECT = re.compile(r'[₹0-9]')
+
+# Header-like lines in transaction history screenshots
+_HEADER_RE = re.compile(r'search transaction|status|payment method', re.IGNORECASE)
+
+_FAILED_KEYWORDS = [
+    'failed', 'failure', 'declined', 'rejected', 'unsuccessful',
+    'not successful', 'could not process', 'error', 'invalid'
+]
+
+
+def _build_failed_automaton(keywords):
+    """Build an Aho-Corasick automaton matching any failure keyword."""
+    automaton = ahocorasick.Automaton()
+    for keyword in keywords:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+
+# Scans a line once for all keywords, several times faster than the regex alternation
+_FAILED_AUTOMATON = _build_failed_automaton(_FAILED_KEYWORDS)
+
+# Amount with the Rupee symbol
+_AMOUNT_RE = re.compile(r'₹\s*(\d+(?:,\d+)*(?:\.\d{2})?)')
+
+# Common patterns for transaction descriptions, each with an optional gate.
+# The lazy patterns that anchor on a trailing keyword retry from every start
+# position, which is quadratic in the line length; a line without the keyword
+# can't match them, so a single cheap search for it decides whether to try.
+_DESC_PATTERNS = [
+    (gate and re.compile(gate, re.IGNORECASE), re.compile(pattern, re.IGNORECASE))
+    for gate, pattern in (
+        # Standard patterns
+        (None, r'(?:from|to|paid to|received from)\s+([A-Za-z0-9\s\-\.]+?)(?=\s+(?:on|at|via|₹|\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)))'),
+        (None, r'(?:UPI|IMPS|NEFT|RTGS)\s*[-:]?\s*([A-Za-z0-9\s\-\.]+)'),
+        (r'\s(?:paid|sent|received)', r'([A-Za-z0-9\s\-\.]+?)(?=\s+(?:paid|sent|received))'),
+        # Additional patterns for common transaction formats
+        (r'\s(?:UPI|IMPS|NEFT|RTGS)', r'([A-Za-z0-9\s\-\.]+?)\s+(?:UPI|IMPS|NEFT|RTGS)'),
+        (None, r'(?:payment|transfer)\s+(?:to|from)\s+([A-Za-z0-9\s\-\.]+)'),
+        # Catch-all pattern for any word sequence before amount
+        (None, r'([A-Za-z0-9\s\-\.]{3,}?)(?=\s*₹)'),
+    )
+]
+
+_CLEANUP_SPACE_RE = re.compile(r'\s+')
+_CLEANUP_PREFIX_RE = re.compile(r'^(?:to|from|by|via|through)\s+', re.IGNORECASE)
+# Trailing transaction identifiers such as "UPI 1234" or "REF ABC12"
+_CLEANUP_SUFFIX_RE = re.compile(r'\s*(?:UPI|IMPS|NEFT|RTGS|REF|ID|NO)[:\s]*(?:\d+|[A-Z0-9]+)?$', re.IGNORECASE)
+
+def _full_year(year, this_year):
+    """Expand an optional 1-4 digit year, resolving two-digit years to within 50 years of now."""
+    if not year:
+        return this_year
+    year = int(year)
+    if year < 100:
+        year += this_year // 100 * 100
+        if year >= this_year + 50:
+            year -= 100
+        elif year < this_year - 50:
+            year += 100
+    return year
+
+@lru_cache(maxsize=4096)
+def _parse_date(date_str, formats):
+    """Parse a normalized date string with the first matching format."""
+    for fmt in formats:
+        try:
+            return datetime.strptime(date_str, fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
 class OCRHandler:
     @staticmethod
     def process_image(image_bytes):
         # Convert bytes to image
         image = Image.open(io.BytesIO(image_bytes))
         
+        # Let JPEGs decode straight to reduced-size grayscale, then hand
+        # tesseract a single channel instead of full-resolution colour
+        image.draft('L', (2000, 2000))
+        if 'A' in image.getbands():
+            # Flatten onto white as pytesseract would; converting directly
+            # would turn transparent pixels into their stored colour, usually black
+            background = Image.new('L', image.size, 255)
+            background.paste(image, (0, 0), image.getchannel('A'))
+            image = background
+        else:
+            image = image.convert('L')
+        
         # Extract text from image
         text = pytesseract.image_to_string(image)
         
         # More precise Rupee symbol handling
-        text = re.sub(r'(?:Rs\.?|INR|\bRs\b)\s*', '₹', text, flags=re.IGNORECASE)
-        text = re.sub(r'(?<![0-9])2(?=\s*[0-9])', '₹', text)
-        text = re.sub(r'₹\s*₹', '₹', text)
+        text = _RUPEE_RE.sub('₹', text)
         
         return text
 
     @staticmethod
     def extract_date(text):
         """Extract date from text using various patterns."""
-        # Common date patterns
-        date_patterns = [
-            # DD Month YYYY
-            r'(\d{1,2})\s*(Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s*(?:\d{2,4})?',
-            # DD-MM-YYYY or DD/MM/YYYY
-            r'(\d{1,2})[-/](\d{1,2})[-/](\d{2,4})',
-            # YYYY-MM-DD
-            r'(\d{4})[-/](\d{1,2})[-/](\d{1,2})',
-            # Month DD, YYYY
-            r'(Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\s*(\d{1,2})(?:\s*,\s*|\s+)(\d{4})',
-        ]
-
-        for pattern in date_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        this_year = datetime.now().year
+        for pattern, formats in _DATE_PATTERNS:
+            match = pattern.search(text)
             if match:
-                try:
-                    # Try to parse the matched date
-                    date_str = match.group(0)
-                    parsed_date = parser.parse(date_str)
-                    return parsed_date.strftime('%Y-%m-%d')
-                except:
-                    continue
+                a, b, year = match.group('a', 'b', 'y')
+                # Month names are cut to their abbreviation for %b
+                date_str = f"{a[:3]} {b[:3]} {_full_year(year, this_year):04d}"
+                parsed_date = _parse_date(date_str, formats)
+                if parsed_date:
+                    return parsed_date
 
         return None
 
     @staticmethod
     def is_failed_transaction(text):
         """Check if the transaction text indicates a failed transaction."""
-        failed_indicators = [
-            'failed', 'failure', 'declined', 'rejected', 'unsuccessful',
-            'transaction failed', 'payment failed', 'not successful',
-            'could not process', 'error', 'invalid'
-        ]
-        text_lower = text.lower()
-        return any(indicator in text_lower for indicator in failed_indicators)
+        return next(_FAILED_AUTOMATON.iter(text.lower()), None) is not None
 
     @staticmethod
     def create_transaction_key(transaction):
         """Create a unique key for a transaction to detect duplicates."""
-        return f"{transaction['date']}_{transaction['amount']}_{transaction['type']}"
+        return (transaction['date'], transaction['amount'], transaction['type'])
 
     @staticmethod
     def extract_transactions(text):
@@ -83,46 +173,33 @@ class OCRHandler:
         # Split text into lines
         lines = text.split('\n')
         
-        # Amount pattern with optional '+' or '-' sign
-        amount_pattern = r'₹\s*(\d+(?:,\d+)*(?:\.\d{2})?)'
-        
-        # Common patterns for transaction descriptions
-        description_patterns = [
-            # Standard patterns
-            r'(?:from|to|paid to|received from)\s+([A-Za-z0-9\s\-\.]+?)(?=\s+(?:on|at|via|₹|\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)))',
-            r'(?:UPI|IMPS|NEFT|RTGS)\s*[-:]?\s*([A-Za-z0-9\s\-\.]+)',
-            r'([A-Za-z0-9\s\-\.]+?)(?=\s+(?:paid|sent|received))',
-            # Additional patterns for common transaction formats
-            r'([A-Za-z0-9\s\-\.]+?)\s+(?:UPI|IMPS|NEFT|RTGS)',
-            r'(?:payment|transfer)\s+(?:to|from)\s+([A-Za-z0-9\s\-\.]+)',
-            # Catch-all pattern for any word sequence before amount
-            r'([A-Za-z0-9\s\-\.]{3,}?)(?=\s*₹)'
-        ]
-        
         current_date = None
+        # Fallback for transactions before any date line
+        today = datetime.now().strftime('%Y-%m-%d')
         
         # Process each line
         for line in lines:
             line = line.strip()
-            if not line:
+            if not _FAST_REJECT.search(line):
                 continue
                 
             # Skip header-like lines
-            if any(header in line.lower() for header in ['search transaction', 'status', 'payment method']):
+            if _HEADER_RE.search(line):
                 continue
             
             # Skip failed transactions
             if OCRHandler.is_failed_transaction(line):
                 continue
             
-            # Try to extract date from the line
+            # Date-only lines set the date for the transactions below them,
+            # so lines that reach the amount check never carry a date
             line_date = OCRHandler.extract_date(line)
             if line_date:
                 current_date = line_date
                 continue
             
             # Find amount in the line
-            amount_match = re.search(amount_pattern, line)
+            amount_match = _AMOUNT_RE.search(line)
             if not amount_match:
                 continue
                 
@@ -131,7 +208,7 @@ class OCRHandler:
                 'amount': 0.0,
                 'type': 'debit',  # default to debit
                 'description': '',
-                'date': current_date or datetime.now().strftime('%Y-%m-%d'),  # fallback to current date if no date found
+                'date': current_date or today,
                 'category': 'Other'  # Default category
             }
             
@@ -139,11 +216,6 @@ class OCRHandler:
             amount_str = amount_match.group(1).replace(',', '')
             transaction['amount'] = float(amount_str)
             
-            # Try to find date in the same line
-            line_date = OCRHandler.extract_date(line)
-            if line_date:
-                transaction['date'] = line_date
-            
             # Determine transaction type - only + symbol indicates credit
             if '+' in line:
                 transaction['type'] = 'credit'
@@ -151,13 +223,15 @@ class OCRHandler:
             # Extract description with improved logic
             description = ''
             # First try the patterns
-            for pattern in description_patterns:
-                desc_match = re.search(pattern, line, re.IGNORECASE)
+            for gate, pattern in _DESC_PATTERNS:
+                if gate is not None and not gate.search(line):
+                    continue
+                desc_match = pattern.search(line)
                 if desc_match:
                     description = desc_match.group(1).strip()
                     # Clean up the description
-                    description = re.sub(r'\s+', ' ', description)  # normalize spaces
-                    description = re.sub(r'^(?:to|from|by|via|through)\s+', '', description, flags=re.IGNORECASE)
+                    description = _CLEANUP_SPACE_RE.sub(' ', description)  # normalize spaces
+                    description = _CLEANUP_PREFIX_RE.sub('', description)
                     if len(description) > 2:  # Allow shorter names but still avoid single characters
                         break
             
@@ -165,21 +239,21 @@ class OCRHandler:
             if not description:
                 pre_amount = line[:amount_match.start()].strip()
                 # Remove common prefixes and clean up
-                pre_amount = re.sub(r'^(?:to|from|by|via|through)\s+', '', pre_amount, flags=re.IGNORECASE)
-                pre_amount = re.sub(r'\s+', ' ', pre_amount)  # normalize spaces
+                pre_amount = _CLEANUP_PREFIX_RE.sub('', pre_amount)
+                pre_amount = _CLEANUP_SPACE_RE.sub(' ', pre_amount)  # normalize spaces
                 if len(pre_amount) > 2:
                     description = pre_amount
 
             # Final cleanup of description
             if description:
                 # Remove any trailing transaction identifiers
-                description = re.sub(r'\s*(?:UPI|IMPS|NEFT|RTGS|REF|ID|NO)[:\s]*(?:\d+|[A-Z0-9]+)?$', '', description, flags=re.IGNORECASE)
+                description = _CLEANUP_SUFFIX_RE.sub('', description)
                 description = description.strip()
             
             transaction['description'] = description or 'Unknown Transaction'
             
             # Make duplicate detection less strict by normalizing values
-            transaction_key = f"{transaction['date']}_{transaction['amount']}_{transaction['type']}"
+            transaction_key = (transaction['date'], transaction['amount'], transaction['type'])
             
             # Check for duplicates
             if transaction_key in seen_transactions:
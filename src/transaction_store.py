@@ -0,0 +1,299 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    date TEXT,
+    timestamp TEXT,
+    amount REAL,
+    description TEXT,
+    type TEXT,
+    category TEXT,
+    bank TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_transactions_key ON transactions (date, amount, description, type);
+CREATE INDEX IF NOT EXISTS ix_transactions_order ON transactions (date DESC, timestamp DESC);
+"""
+_COLUMNS = ('date', 'timestamp', 'amount', 'description', 'type', 'category', 'bank')
+# id breaks ties in insertion order, matching where add() places equal keys
+_SELECT_SQL = f"SELECT {', '.join(_COLUMNS)} FROM transactions ORDER BY date DESC, timestamp DESC, id"
+_INSERT_SQL = f"INSERT OR IGNORE INTO transactions ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+_UPDATE_CATEGORY_SQL = (
+    "UPDATE transactions SET category = ?, timestamp = ? "
+    "WHERE date IS ? AND amount IS ? AND description IS ? AND type IS ?"
+)
+_CLEAR_SQL = "DELETE FROM transactions"
+
+
+def transaction_key(transaction: Dict) -> tuple:
+    """Key used to detect duplicate transactions."""
+    return (transaction['date'], transaction['amount'], transaction['description'], transaction['type'])
+
+
+def _row(transaction: Dict) -> tuple:
+    return tuple(transaction.get(column) for column in _COLUMNS)
+
+
+def _from_row(row: tuple) -> Dict:
+    # Transactions without a bank (OCR imports) never had the key
+    return {column: value for column, value in zip(_COLUMNS, row) if value is not None or column != 'bank'}
+
+
+def _sort_key(transaction: Dict):
+    return (transaction.get('date', ''), transaction.get('timestamp', ''))
+
+
+def _amount_paise(transaction: Dict) -> int:
+    return round(float(transaction.get('amount', 0)) * 100)
+
+
+def _insert_position(sort_keys: List[tuple], key: tuple) -> int:
+    """Binary search for where key goes in a descending list, after any equal keys."""
+    lo, hi = 0, len(sort_keys)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if sort_keys[mid] < key:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+class TransactionStore:
+    """Transactions held in memory, newest first, and persisted to SQLite.
+
+    Reads never touch disk. Mutations update the in-memory list and queue the
+    matching SQL; a single debounced flush then applies the queued statements
+    in one transaction, so each change costs index-sized disk work rather than
+    a rewrite of the whole history.
+    Items stay ordered by (date, timestamp) descending; sort_keys mirrors that
+    order so changes are placed by binary search instead of re-sorting.
+    """
+    # Seconds to wait for further changes before writing to disk
+    FLUSH_DELAY = 0.2
+    # Upper bound for the doubling delay between retries of a failed write
+    FLUSH_RETRY_MAX_DELAY = 30.0
+
+    def __init__(self, path: str, legacy_json_path: Optional[str] = None):
+        self.path = path
+        # transactions.json from before the SQLite store, imported once
+        self.legacy_json_path = legacy_json_path
+        self.items: List[Dict] = []
+        self.sort_keys: List[tuple] = []
+        self.keys = set()
+        # Running totals in paise, so summaries need neither a scan nor float sums
+        self.credit_paise = 0
+        self.debit_paise = 0
+        # Bumped on every change. Starting from the clock keeps versions from
+        # repeating across restarts, so they are safe to hand out as ETags.
+        self.version = time.time_ns()
+        self.lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        # (sql, parameter rows) waiting for the next flush, in order
+        self._pending: List[tuple] = []
+
+    def load(self):
+        """Load transactions from the database, replacing anything held in memory."""
+        with closing(self._connect()) as conn:
+            with conn:
+                conn.executescript(_SCHEMA)
+                imported = self._import_legacy_json(conn)
+            transactions = [_from_row(row) for row in conn.execute(_SELECT_SQL)]
+        if imported:
+            # Rename so clearing the database later doesn't bring these back on restart
+            os.replace(self.legacy_json_path, f"{self.legacy_json_path}.imported")
+
+        self._pending = []
+        self.items = transactions
+        self.sort_keys = [_sort_key(t) for t in transactions]
+        self.keys = {transaction_key(t) for t in transactions}
+        self.credit_paise = 0
+        self.debit_paise = 0
+        self._add_totals(transactions)
+        self.version += 1
+
+    def add(self, new_transactions: List[Dict], timestamp: Optional[str] = None) -> int:
+        """Add transactions, skipping duplicates. Returns the number added.
+
+        Transactions without a timestamp get the given one, or the current time.
+        """
+        if timestamp is None:
+            timestamp = datetime.now().isoformat()
+        added = []
+        added_keys = set()
+        for transaction in new_transactions:
+            # Add default category if not present
+            if 'category' not in transaction:
+                transaction['category'] = 'Other'
+
+            # Add timestamp if not present
+            if 'timestamp' not in transaction:
+                transaction['timestamp'] = timestamp
+
+            # Skip transactions that already exist, including repeats within this batch
+            key = transaction_key(transaction)
+            if key in self.keys or key in added_keys:
+                continue
+            added_keys.add(key)
+            added.append(transaction)
+
+        if added:
+            # Find every position before inserting anything, so a batch with
+            # unorderable dates fails without leaving the store half updated
+            added.sort(key=_sort_key, reverse=True)
+            positions = [(_insert_position(self.sort_keys, _sort_key(t)), t) for t in added]
+            # Insert back to front so earlier positions stay valid
+            for position, transaction in reversed(positions):
+                self._insert_at(position, transaction)
+            self.keys |= added_keys
+            self._add_totals(added)
+            self._pending.append((_INSERT_SQL, [_row(t) for t in added]))
+            self._changed()
+        return len(added)
+
+    def update_categories(self, updates: Dict[int, str]) -> Dict[int, str]:
+        """Set categories by transaction index. Returns the previous categories."""
+        for index in updates:
+            if not 0 <= index < len(self.items):
+                raise IndexError(index)
+
+        timestamp = datetime.now().isoformat()
+        old_categories = {}
+        for index, category in updates.items():
+            transaction = self.items[index]
+            old_categories[index] = transaction.get('category', 'Other')
+            transaction['category'] = category
+            transaction['timestamp'] = timestamp
+
+        # Only the updated items moved, so re-insert just those
+        updated = [self.items[index] for index in sorted(updates)]
+        self._pending.append((_UPDATE_CATEGORY_SQL, [
+            (t['category'], t['timestamp'], t['date'], t['amount'], t['description'], t['type'])
+            for t in updated
+        ]))
+        for index in sorted(updates, reverse=True):
+            del self.items[index]
+            del self.sort_keys[index]
+        for transaction in updated:
+            self._insert_at(_insert_position(self.sort_keys, _sort_key(transaction)), transaction)
+        self._changed()
+        return old_categories
+
+    def clear(self):
+        """Remove all transactions."""
+        self.items = []
+        self.sort_keys = []
+        self.keys = set()
+        self.credit_paise = 0
+        self.debit_paise = 0
+        # Nothing queued earlier matters once the table is emptied
+        self._pending = [(_CLEAR_SQL, [()])]
+        self._changed()
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}"'
+
+    @property
+    def credit_total(self) -> float:
+        return self.credit_paise / 100
+
+    @property
+    def debit_total(self) -> float:
+        return self.debit_paise / 100
+
+    def _add_totals(self, transactions: List[Dict]):
+        for transaction in transactions:
+            if transaction.get('type') == 'credit':
+                self.credit_paise += _amount_paise(transaction)
+            else:
+                self.debit_paise += _amount_paise(transaction)
+
+    def _changed(self):
+        self.version += 1
+        self.schedule_flush()
+
+    def _insert_at(self, position: int, transaction: Dict):
+        self.items.insert(position, transaction)
+        self.sort_keys.insert(position, _sort_key(transaction))
+
+    def schedule_flush(self):
+        """Write to disk shortly, coalescing with any flush already pending."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop to defer to, e.g. when used from a script
+            self._write(self._take_pending())
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        delay = self.FLUSH_DELAY
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Error writing transactions to %s: %s", self.path, e)
+                # The failed changes were queued again; retry, backing off
+                delay = min(delay * 2, self.FLUSH_RETRY_MAX_DELAY)
+                continue
+            # Changes made while the write ran found this task still running
+            # and scheduled nothing, so write them too before finishing
+            if not self._pending:
+                return
+            delay = self.FLUSH_DELAY
+
+    async def flush(self):
+        """Apply queued changes now, in a worker thread so the event loop isn't blocked."""
+        async with self.lock:
+            pending = self._take_pending()
+            if pending:
+                await asyncio.to_thread(self._write, pending)
+
+    async def close(self):
+        """Cancel any pending debounced flush and write immediately."""
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
+
+    def _take_pending(self) -> List[tuple]:
+        pending, self._pending = self._pending, []
+        return pending
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        # WAL lets readers of the file proceed while a flush is writing
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _write(self, pending: List[tuple]):
+        try:
+            with closing(self._connect()) as conn, conn:
+                for sql, rows in pending:
+                    conn.executemany(sql, rows)
+        except Exception:
+            # Keep the changes queued for the next flush rather than dropping them
+            self._pending[:0] = pending
+            raise
+
+    def _import_legacy_json(self, conn: sqlite3.Connection) -> bool:
+        if not self.legacy_json_path or not os.path.exists(self.legacy_json_path):
+            return False
+        with open(self.legacy_json_path, 'rb') as f:
+            transactions = orjson.loads(f.read())
+        conn.executemany(_INSERT_SQL, [_row(t) for t in transactions])
+        logger.info("Imported %d transaction(s) from %s", len(transactions), self.legacy_json_path)
+        return True